@@ -0,0 +1,17 @@
+"""Lookup of ESP-r executables.
+
+Kept apart from espy.utils so that the subprocess wrappers (espy.bps,
+espy.clm) can be imported without numpy or numba.
+"""
+from functools import lru_cache
+from shutil import which
+
+
+@lru_cache(maxsize=None)
+def executable(name):
+    """Full path of an executable on PATH, looked up once per name.
+
+    Starting processes from an absolute path lets subprocess use the faster
+    posix_spawn route. Falls back to name if it is not found on PATH.
+    """
+    return which(name) or name
@@ -0,0 +1,81 @@
+"""Numeric kernels for polygon geometry.
+
+Each kernel takes a contiguous (n, 3) float64 array of polygon vertices, as
+made by as_polygon(...). If numba is installed they are compiled scalar
+loops, otherwise NumPy equivalents are used.
+"""
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional
+    njit = None
+
+
+def as_polygon(p):
+    """Polygon vertices p as a contiguous (n, 3) float64 array.
+
+    (n, 2) plan coordinates are taken to lie in the z = 0 plane. Any other
+    shape raises ValueError, as the compiled kernels do no bounds checking.
+    """
+    p = np.ascontiguousarray(p, dtype=np.float64)
+    if p.ndim == 2 and p.shape[1] == 2:
+        p = np.column_stack((p, np.zeros(len(p))))
+    if p.ndim != 2 or p.shape[1] != 3:
+        raise ValueError(f"expected (n, 3) polygon vertices, got shape {p.shape}")
+    return p
+
+
+def cross_sums(p):
+    """Sums over each polygon's vertices of the vertex crossed with the next.
+
+    p is an (..., n, 3) array of polygon vertices. Returns the x, y and z
+    components of the sums, each of shape (...), without building the array
+    of cross products. Half the length of the sum is the polygon's area.
+    """
+    q = np.roll(p, -1, axis=-2)
+    x = (p[..., 1] * q[..., 2] - p[..., 2] * q[..., 1]).sum(axis=-1)
+    y = (p[..., 2] * q[..., 0] - p[..., 0] * q[..., 2]).sum(axis=-1)
+    z = (p[..., 0] * q[..., 1] - p[..., 1] * q[..., 0]).sum(axis=-1)
+    return x, y, z
+
+
+if njit:
+    @njit(cache=True)
+    def newell_normal(p):
+        """Unnormalised Newell normal of polygon vertex array p."""
+        n = p.shape[0]
+        normal = np.zeros(3)
+        for i in range(n):
+            j = (i + 1) % n
+            normal[0] += (p[i, 1] - p[j, 1]) * (p[i, 2] + p[j, 2])
+            normal[1] += (p[i, 2] - p[j, 2]) * (p[i, 0] + p[j, 0])
+            normal[2] += (p[i, 0] - p[j, 0]) * (p[i, 1] + p[j, 1])
+        return normal
+
+    @njit(cache=True)
+    def polygon_area(p):
+        """Area of planar polygon vertex array p."""
+        n = p.shape[0]
+        x = y = z = 0.0
+        for i in range(n):
+            j = (i + 1) % n
+            x += p[i, 1] * p[j, 2] - p[i, 2] * p[j, 1]
+            y += p[i, 2] * p[j, 0] - p[i, 0] * p[j, 2]
+            z += p[i, 0] * p[j, 1] - p[i, 1] * p[j, 0]
+        return np.sqrt(x * x + y * y + z * z) / 2
+else:
+    def newell_normal(p):
+        """Unnormalised Newell normal of polygon vertex array p."""
+        # Each vertex paired with the next, wrapping round to the first.
+        q = np.roll(p, -1, axis=0)
+        # Rows are (y, z, x) differences times (z, x, y) sums, i.e. the
+        # x, y and z components of the normal, summed in one reduction.
+        return (
+            (p[:, [1, 2, 0]] - q[:, [1, 2, 0]]) * (p[:, [2, 0, 1]] + q[:, [2, 0, 1]])
+        ).sum(axis=0)
+
+    def polygon_area(p):
+        """Area of planar polygon vertex array p."""
+        x, y, z = cross_sums(p)
+        return np.sqrt(x * x + y * y + z * z) / 2
@@ -1,66 +1,262 @@
-"""Functions to interact with bps."""
-from subprocess import PIPE, run
-
-
-class Bps:
-    """Instance of BPS."""
-
-    counter = 0  # track number of instances of BPS
-
-    def __init__(self) -> None:
-        Bps.counter += 1
-
-    def __del__(self) -> None:
-        Bps.counter -= 1
-
-
-def run_preset(cfg_file, preset):
-    """Run simulation with preset."""
-    bps = run(
-        ["bps", "-file", cfg_file, "-mode", "script", "-p", preset, "silent"],
-        stdout=PIPE,
-        stderr=PIPE,
-        check=True,
-    )
-    return bps
-
-
-def run_sim(
-    cfg_file,
-    res_file,
-    sim_start_d,
-    sim_start_m,
-    sim_end_d,
-    sim_end_m,
-    start_up_d,
-    tsph,
-    integrate,
-):
-    """Run basic simulation."""
-    # Only designed to work for models without additional networks eg. massflow
-    cmd = [
-        "",
-        "c",
-        res_file,
-        "{} {}".format(sim_start_d, sim_start_m),
-        "{} {}".format(sim_end_d, sim_end_m),
-        "{}".format(start_up_d),
-        "{}".format(tsph),
-        integrate,
-        "s",
-        "Y",
-        "description",
-        "Y",
-        "Y",
-        "-",
-        "-",
-    ]
-    cmd = "\n".join(cmd)
-    bps = run(
-        ["bps", "-file", cfg_file, "-mode", "script"],
-        stdout=PIPE,
-        input=cmd,
-        encoding="ascii",
-        check=True,
-    )
-    return bps
+"""Functions to interact with bps."""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from subprocess import DEVNULL, PIPE, CalledProcessError, CompletedProcess, Popen, run
+
+from espy._executable import executable
+
+
+class Bps:
+    """Instance of BPS.
+
+    Use as a context manager, or call close() when finished with, to keep
+    the instance count up to date.
+    """
+
+    __slots__ = ("_open",)
+    counter = 0  # track number of instances of BPS
+
+    def __init__(self) -> None:
+        Bps.counter += 1
+        self._open = True
+
+    def close(self) -> None:
+        """Release this instance."""
+        if self._open:
+            self._open = False
+            Bps.counter -= 1
+
+    def __enter__(self) -> "Bps":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# Script fed to bps on stdin for basic simulations: an empty line, one block
+# per simulation (each ending back at the main menu), then exit.
+_SIM_SCRIPT = "\n%s\n-"
+_SIM_BLOCK = "c\n%s\n%s %s\n%s %s\n%s\n%s\n%s\ns\nY\ndescription\nY\nY\n-"
+
+
+def _bps_args(cfg_file, *extra):
+    """Command line for running bps in script mode."""
+    return [executable("bps"), "-file", cfg_file, "-mode", "script", *extra]
+
+
+def _preset_args(cfg_file, preset):
+    """Command line for running a simulation preset."""
+    return _bps_args(cfg_file, "-p", preset, "silent")
+
+
+def _run_bps(args, pool=None, **kwargs):
+    """Run bps to completion, using a warm process from pool if given."""
+    if pool:
+        return pool.run(args, stdout=PIPE, check=True, **kwargs)
+    # espy opens no inheritable descriptors, and keeping them lets
+    # subprocess start bps with posix_spawn.
+    return run(args, stdout=PIPE, check=True, close_fds=False, **kwargs)
+
+
+def _sim_script(
+    res_file,
+    sim_start_d,
+    sim_start_m,
+    sim_end_d,
+    sim_end_m,
+    start_up_d,
+    tsph,
+    integrate,
+):
+    """Script fed to bps on stdin for a basic simulation."""
+    return _SIM_SCRIPT % _SIM_BLOCK % (
+        res_file,
+        sim_start_d,
+        sim_start_m,
+        sim_end_d,
+        sim_end_m,
+        start_up_d,
+        tsph,
+        integrate,
+    )
+
+
+def run_preset(cfg_file, preset):
+    """Run simulation with preset."""
+    return _run_bps(_preset_args(cfg_file, preset), stderr=PIPE)
+
+
+def run_sim(
+    cfg_file,
+    res_file,
+    sim_start_d,
+    sim_start_m,
+    sim_end_d,
+    sim_end_m,
+    start_up_d,
+    tsph,
+    integrate,
+    pool=None,
+):
+    """Run basic simulation.
+
+    If pool (espy.proc_pool.ProcessPool) is given, a warm bps process is used.
+    """
+    # Only designed to work for models without additional networks eg. massflow
+    cmd = _sim_script(
+        res_file,
+        sim_start_d,
+        sim_start_m,
+        sim_end_d,
+        sim_end_m,
+        start_up_d,
+        tsph,
+        integrate,
+    )
+    return _run_bps(_bps_args(cfg_file), pool, input=cmd, encoding="ascii")
+
+
+def run_sims_batched(cfg_file, jobs, pool=None):
+    """Run several basic simulations of one model in a single bps session.
+
+    bps is started once for all simulations rather than once each. Each
+    simulation is driven with the same script-mode menu sequence as
+    run_sim(...), as written for ESP-r 13.x; other versions may lay out the
+    simulation menu differently. Relies on bps returning to its main menu after
+    each simulation, so each results file is checked once bps has exited.
+
+    Arguments
+        cfg_file: str
+            ESP-r configuration file
+        jobs: list, tuple (8)
+            run_sim(...) arguments following cfg_file, for each simulation
+            e.g. [('jan.res', 1, 1, 31, 1, 3, 1, 'a'), ('jul.res', 1, 7, 31, 7, 3, 1, 'a')]
+        pool: espy.proc_pool.ProcessPool or None; default None
+            if given, a warm bps process is used
+
+    Returns
+        subprocess.CompletedProcess
+            with str output, as for run_sim(...)
+
+    Raises
+        RuntimeError
+            if any results file was not written by this run
+    """
+    cmd = _SIM_SCRIPT % "\n".join([_SIM_BLOCK % tuple(job) for job in jobs])
+    # Whole seconds, so filesystems with coarse timestamps are not flagged
+    started = int(time.time())
+    proc = _run_bps(_bps_args(cfg_file), pool, input=cmd, encoding="ascii")
+    missing = [
+        job[0]
+        for job in jobs
+        if not os.path.isfile(job[0]) or os.path.getmtime(job[0]) < started
+    ]
+    if missing:
+        raise RuntimeError(
+            "bps did not write results file(s): {}".format(", ".join(missing))
+        )
+    return proc
+
+
+def start_preset(cfg_file, preset):
+    """Start simulation with preset without waiting for it to finish.
+
+    Returns
+        subprocess.Popen
+            handle to the running bps process, to be passed to wait_all(...)
+    """
+    return Popen(
+        _preset_args(cfg_file, preset),
+        stdin=DEVNULL,
+        stdout=PIPE,
+        stderr=PIPE,
+        close_fds=False,
+    )
+
+
+def start_sim(cfg_file, res_file, *args):
+    """Start basic simulation without waiting for it to finish.
+
+    Takes the same arguments as run_sim(...).
+
+    Returns
+        subprocess.Popen
+            handle to the running bps process, to be passed to wait_all(...)
+    """
+    # The script is small enough to sit in the pipe buffer, so it is written
+    # up front and the child reads it in its own time. bps is only started
+    # once the whole script is written, and both ends of the pipe are closed
+    # in this process whatever happens.
+    read_fd, write_fd = os.pipe()
+    try:
+        try:
+            os.write(write_fd, _sim_script(res_file, *args).encode("ascii"))
+        finally:
+            os.close(write_fd)
+        return Popen(
+            _bps_args(cfg_file),
+            stdin=read_fd,
+            stdout=PIPE,
+            stderr=PIPE,
+            close_fds=False,
+        )
+    finally:
+        os.close(read_fd)
+
+
+def wait_all(procs, max_workers=None):
+    """Wait for bps processes started with start_preset/start_sim.
+
+    Output pipes are drained concurrently so that no process stalls on a
+    full pipe while another is being waited on.
+
+    Arguments
+        procs: list, subprocess.Popen
+            handles returned by start_preset(...) or start_sim(...)
+        max_workers: int or None; default None
+            number of processes drained at once, defaults to len(procs)
+
+    Returns
+        list, subprocess.CompletedProcess
+            in the same order as procs
+
+    Raises
+        subprocess.CalledProcessError
+            if any process exited with a non-zero return code
+    """
+
+    def _reap(proc):
+        stdout, stderr = proc.communicate()
+        return CompletedProcess(proc.args, proc.returncode, stdout, stderr)
+
+    if not procs:
+        return []
+    with ThreadPoolExecutor(max_workers=max_workers or len(procs)) as executor:
+        completed = list(executor.map(_reap, procs))
+    for bps in completed:
+        if bps.returncode:
+            raise CalledProcessError(bps.returncode, bps.args, bps.stdout, bps.stderr)
+    return completed
+
+
+def run_many(jobs, max_workers=None):
+    """Run several preset simulations in parallel.
+
+    Arguments
+        jobs: list, tuple (2), str
+            (cfg_file, preset) for each simulation
+            e.g. [('model_a.cfg', 'annual'), ('model_b.cfg', 'annual')]
+        max_workers: int or None; default None
+            maximum number of concurrent bps processes, defaults to cpu count
+
+    Returns
+        list, subprocess.CompletedProcess
+            in the same order as jobs
+
+    Example
+        cfgs = ['./cfg/base.cfg', './cfg/insulated.cfg']
+        run_many([(cfg, 'annual') for cfg in cfgs])
+    """
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        return list(executor.map(lambda job: run_preset(*job), jobs))
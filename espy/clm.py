@@ -1,49 +1,129 @@
 """Functions to interact with clm."""
-from subprocess import PIPE, run
-
-
-def get_avg_degree_days(weather_file, temp_base=15.5):
-    """Returns the daily average degree days"""
-    cmd = ["", ">", "temp.csv", "^", "e", "c", "5", "a", str(temp_base), "-", ">", "-"]
-    cmd = "\n".join(cmd)
-    clm = run(
-        ["clm", "-mode", "script", "-file", weather_file],
-        input=cmd,
-        stdout=PIPE,
-        stderr=PIPE,
-        encoding="ascii",
-    )
-    with open("temp.csv", "r") as f_in:
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from subprocess import DEVNULL, PIPE, CalledProcessError, run
+
+from espy._executable import executable
+
+# Scripts fed to clm on stdin, with placeholders for the file names etc.
+_DEGREE_DAYS_SCRIPT = b"\n>\ntemp.csv\n^\ne\nc\n5\na\n%b\n-\n>\n-"
+_EPW_TO_ESPR_SCRIPT = b"*\n%b\nk\na\n%b\n-"
+_BIN_TO_ASCII_SCRIPT = b"<\n%b\nj\na\n%b\nY\n-"
+
+# Bytes read from the end of clm report files, enough for the final lines.
+_TAIL_BYTES = 8192
+
+
+def _clm_args(*extra):
+    """Command line for running clm in script mode."""
+    return [executable("clm"), "-mode", "script", *extra]
+
+
+def _run_clm(args, pool=None, **kwargs):
+    """Run clm to completion, using a warm process from pool if given."""
+    if pool:
+        return pool.run(args, stdout=DEVNULL, **kwargs)
+    # espy opens no inheritable descriptors, and keeping them lets
+    # subprocess start clm with posix_spawn.
+    return run(args, stdout=DEVNULL, close_fds=False, **kwargs)
+
+
+def get_avg_degree_days(weather_file, temp_base=15.5, pool=None):
+    """Returns the daily average degree days
+
+    If pool (espy.proc_pool.ProcessPool) is given, a warm clm process is used.
+    """
+    cmd = _DEGREE_DAYS_SCRIPT % str(temp_base).encode("ascii")
+    _run_clm(_clm_args("-file", weather_file), pool, input=cmd, stderr=DEVNULL)
+    # Only the penultimate line is needed, so read just the end of the file
+    # rather than reading and splitting all of it.
+    with open("temp.csv", "rb") as f_in:
+        f_in.seek(0, os.SEEK_END)
+        f_in.seek(max(0, f_in.tell() - _TAIL_BYTES))
         lines = f_in.read().splitlines()
-        last_line = lines[-2].split(",")[1]
+    last_line = lines[-2].split(b",")[1]
     return float(last_line)
     
 
-def epw_to_espr(epw_file, espr_file="newclim"):
+def _epw_to_espr_script(epw_file, espr_file):
+    """Script fed to clm on stdin to convert an EPW file."""
+    return _EPW_TO_ESPR_SCRIPT % (espr_file.encode("ascii"), epw_file.encode("ascii"))
+
+
+def epw_to_espr(epw_file, espr_file="newclim", pool=None):
     """Convert EPW file to ESP-r binary weather file.
+
+    If pool (espy.proc_pool.ProcessPool) is given, a warm clm process is used.
     """
 
-    cmd = ["*", espr_file, "k", "a", epw_file, "-"]
-    cmd = "\n".join(cmd)
-    run(
-        ["clm", "-mode", "script"],
-        stdout=PIPE,
-        input=cmd,
-        encoding="ascii",
-        check=True,
+    cmd = _epw_to_espr_script(epw_file, espr_file)
+    _run_clm(_clm_args(), pool, input=cmd, check=True)
+
+
+async def epw_to_espr_async(epw_file, espr_file="newclim"):
+    """Convert EPW file to ESP-r binary weather file without blocking.
+
+    Coroutine equivalent of epw_to_espr(...), to be awaited from a running
+    event loop, e.g. in Jupyter: await clm.epw_to_espr_async('in.epw', 'out')
+    """
+    args = _clm_args()
+    clm = await asyncio.create_subprocess_exec(
+        *args, stdin=PIPE, stdout=DEVNULL, close_fds=False
     )
+    await clm.communicate(_epw_to_espr_script(epw_file, espr_file))
+    if clm.returncode:
+        raise CalledProcessError(clm.returncode, args)
+
+
+async def convert_many_async(pairs, concurrency=8):
+    """Convert several EPW files to ESP-r binary weather files concurrently.
+
+    Coroutine equivalent of convert_many(...), to be awaited from a running
+    event loop.
+
+    Example
+        await convert_many_async([(f, f[:-4]) for f in glob.glob('*.epw')])
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _convert(epw_file, espr_file):
+        async with semaphore:
+            await epw_to_espr_async(epw_file, espr_file)
+
+    await asyncio.gather(*[_convert(*pair) for pair in pairs])
+
+
+def convert_many(pairs, concurrency=8):
+    """Convert several EPW files to ESP-r binary weather files concurrently.
+
+    Can be called whether or not an event loop is already running (e.g. in
+    Jupyter); in that case conversions run on threads instead of asyncio.
+
+    Arguments
+        pairs: list, tuple (2), str
+            (epw_file, espr_file) for each conversion
+        concurrency: int; default 8
+            maximum number of clm processes running at once
+
+    Example
+        convert_many([(f, f[:-4]) for f in glob.glob('*.epw')])
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        asyncio.run(convert_many_async(pairs, concurrency))
+        return
+    # asyncio.run cannot be used inside a running loop.
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(lambda pair: epw_to_espr(*pair), pairs))
 
     
-def weather_bin_to_ascii(bin_file, ascii_file="newclim.a"):
+def weather_bin_to_ascii(bin_file, ascii_file="newclim.a", pool=None):
     """Convert ESP-r binary weather file to ascii file.
+
+    If pool (espy.proc_pool.ProcessPool) is given, a warm clm process is used.
     """
 
-    cmd = ["<", bin_file, "j", "a", ascii_file, "Y", "-"]
-    cmd = "\n".join(cmd)
-    run(
-        ["clm", "-mode", "script"],
-        stdout=PIPE,
-        input=cmd,
-        encoding="ascii",
-        check=True,
-    )
+    cmd = _BIN_TO_ASCII_SCRIPT % (bin_file.encode("ascii"), ascii_file.encode("ascii"))
+    _run_clm(_clm_args(), pool, input=cmd, check=True)
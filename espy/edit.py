@@ -1,43 +1,66 @@
 """Functions that directory edit ESP-r files."""
+import re
+
 from espy.utils import sed
 
 # pylint: disable-msg=C0103
 
+# Valid usage options for each surface type.
+_DOOR_OPTS = frozenset({"CLOSED", "UNDERCUT", "OPEN", "BIDIRECTIONAL"})
+_WINDOW_OPTS = frozenset({"CLOSED", "CRACK", "OPEN", "SASH", "BIDIRECTIONAL"})
+_FRAME_OPTS = frozenset({"CLOSED", "CRACK", "VENT"})
+_USAGE_OPTS = {"DOOR": _DOOR_OPTS, "WINDOW": _WINDOW_OPTS, "FRAME": _FRAME_OPTS}
+
+
+def bulk_usage_edit(geo_file, changes):
+    """Directly edit several surface usages in geometry file in one pass.
+
+    All changes are matched against the original file contents, so one edit
+    never acts on the result of another (e.g. two changes can swap usages).
+    If any change is invalid, no changes are made.
+
+    Arguments
+        geo_file: str
+            zone geometry file name
+        changes: list, tuple (3), str
+            (surface type, original usage, updated usage) for each edit
+            surface type is one of 'DOOR', 'WINDOW' or 'FRAME'
+            e.g. [('DOOR', 'CLOSED', 'OPEN'), ('WINDOW', 'CLOSED', 'CRACK')]
+
+    Returns
+        None
+    """
+    repl_table = {}
+    for kind, original, updated in changes:
+        options = _USAGE_OPTS.get(kind, ())
+        # Check that original and updated are valid options
+        if original in options and updated in options:
+            repl_table[f"{kind},{original}"] = f"{kind},{updated}"
+        else:
+            print("Invalid original or updated options provided. No changes being made.")
+            return
+    if not repl_table:
+        return
+    # Longest first so that no option shadows another it is a prefix of.
+    pattern = re.compile(
+        "|".join(re.escape(x) for x in sorted(repl_table, key=len, reverse=True))
+    )
+    sed(pattern, lambda m: repl_table[m.group(0)], geo_file)
+
 
 def door_usage(geo_file, original, updated):
     """Directly edit door usage in geometry file.
     """
-
-    options = ["CLOSED", "UNDERCUT", "OPEN", "BIDIRECTIONAL"]
-    options_set = set(options)
-    # Check that original and updated are valid options
-    if original in options_set and updated in options_set:
-        sed("DOOR," + original, "DOOR," + updated, geo_file)
-    else:
-        print("Invalid original or updated options provided. No changes being made.")
+    bulk_usage_edit(geo_file, [("DOOR", original, updated)])
 
 
 def window_usage(geo_file, original, updated):
     """Directly edit window usage in geometry file.
     """
-
-    options = ["CLOSED", "CRACK", "OPEN", "SASH", "BIDIRECTIONAL"]
-    options_set = set(options)
-    # Check that original and updated are valid options
-    if original in options_set and updated in options_set:
-        sed("WINDOW," + original, "WINDOW," + updated, geo_file)
-    else:
-        print("Invalid original or updated options provided. No changes being made.")
+    bulk_usage_edit(geo_file, [("WINDOW", original, updated)])
 
 
 def frame_usage(geo_file, original, updated):
     """Directly edit frame usage in geometry file.
     """
-
-    options = ["CLOSED", "CRACK", "VENT"]
-    options_set = set(options)
-    # Check that original and updated are valid options
-    if original in options_set and updated in options_set:
-        sed("FRAME," + original, "FRAME," + updated, geo_file)
-    else:
-        print("Invalid original or updated options provided. No changes being made.")
+    bulk_usage_edit(geo_file, [("FRAME", original, updated)])
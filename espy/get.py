@@ -1,34 +1,48 @@
 """Functions for importing and reading ESP-r files"""
-import csv
+import os
 from datetime import datetime
-from itertools import accumulate
-from espy.utils import space_data_to_list, split_to_float,area
+from functools import lru_cache
+from io import StringIO
+import numpy as np
+from espy.utils import space_data_to_list, surface_areas
 from espy import plot
 
 # pylint: disable-msg=C0103
 # pylint: disable=no-member
 
+# Fields of a construction layer, as listed in ESP-r zone construction files
+LAYER_DTYPE = np.dtype(
+    [
+        ("conductivity", "f8"),
+        ("density", "f8"),
+        ("specific_heat", "f8"),
+        ("thickness", "f8"),
+        ("diffusion_resistance", "f8"),
+    ]
+)
+
+# Read buffer size for input files, larger than the 8 KiB default so that
+# big geometry and weather files are read in fewer system calls
+_READ_BUFFER = 1 << 18
+
+
 def zone_selection(cfg_file, zone_input):
     """Maps requested zone selection to ESP-r menu selection."""
     # TODO: This will not work if zone on secondary page
     # Read cfg file for list of zones
-    cfg = config(cfg_file)
+    cfg = config_cached(cfg_file)
     zones = cfg["zones"]
 
-    # Loop through for list of zone names
-    zone_names = []
-    for ind, _ in enumerate(zones):
-        file_path = zones[ind][1]["geo"]
-        zone_names.append(geometry(file_path)["name"])
-
     # format "id:<zone name>"
-    if zone_input[:3] == "id:":
+    if zone_input.startswith("id:"):
             selected_zone = zone_input[3:]
-            try:
-                ind = zone_names.index(selected_zone)
-                zone_select = chr(96 + ind + 1)
-                geo_file = zones[ind][1]["geo"]
-            except ValueError:
+            # Read zone names in turn, stopping at the first match
+            for ind, zone in enumerate(zones):
+                if geometry_cached(zone[1]["geo"])["name"] == selected_zone:
+                    zone_select = chr(96 + ind + 1)
+                    geo_file = zone[1]["geo"]
+                    break
+            else:
                 print("zone selection error, '{}' not found".format(selected_zone))
                 zone_select = None
                 geo_file = None
@@ -50,7 +64,7 @@ def zone_selection(cfg_file, zone_input):
 def surface_selection(geo_file, surf_input):
     """Maps requested surface selection to ESP-r menu selection."""
     # TODO: This will not work if surface on secondary page
-    geo = geometry(geo_file)
+    geo = geometry_cached(geo_file)
     props = geo["props"]
 
     # Loop through for list of zone names
@@ -59,7 +73,7 @@ def surface_selection(geo_file, surf_input):
         surf_names.append(surf[0])
 
     # format "id:<zone name>"
-    if surf_input[:3] == "id:":
+    if surf_input.startswith("id:"):
             selected_surf = surf_input[3:]
             try:
                 ind = surf_names.index(selected_surf)
@@ -79,40 +93,56 @@ def surface_selection(geo_file, surf_input):
     return surf_select
 
 
+def _iter_file(filepath):
+    """
+    Yields the lines of generic ESP-r format files as _read_file lists them,
+    reading the file line by line rather than holding it all in memory.
+    """
+    with open(filepath, "r", buffering=_READ_BUFFER) as fp:
+        for line in fp:
+            # Take just the part before the first comment character, and split
+            # it after the first run of whitespace. Leading whitespace is
+            # skipped by split; trailing whitespace is removed first.
+            row = line.partition("#")[0].rstrip().split(None, 1)
+            # Empty lines are dropped
+            if row:
+                yield row
+
+
 def _read_file(filepath):
     """
     Reads in generic ESP-r format files.
     All comments (#) are stripped and each line is an element in the returned
     list. Each line element is stripped of whitespace at either end, and is
-    partitioned at the first whitespace character.
+    partitioned at the first run of whitespace (spaces or tabs).
     Further splitting of elements will be required based on what file type is
     being read.
     """
-    file = []
-    with open(filepath, "r") as fp:
-        for line in fp:
-            # .partition returns a tuple: everything before the partition string,
-            # the partition string, and everything after the partition string.
-            # By indexing with [0] takes just the part before the partition string.
-            line = line.partition("#")[0]
+    return list(_iter_file(filepath))
 
-            # Split line after first whitespace and remove all whitespace
-            line = [x.strip() for x in line.strip().split(" ", 1)]
 
-            # if line not empty append to file list
-            if line[0]:
-                file.append(line)
-    return file
+# Month abbreviations used in ESP-r file dates
+_MONTHS = {
+    "Jan": 1, "Feb": 2, "Mar": 3, "Apr": 4, "May": 5, "Jun": 6,
+    "Jul": 7, "Aug": 8, "Sep": 9, "Oct": 10, "Nov": 11, "Dec": 12,
+}
 
 
-def _get_var(ifile, find_str):
-    y = [x[1] for x in ifile if x[0] == find_str]
-    if y:
-        var = y[0]
-    else:
-        var = None
+def _parse_espr_date(date):
+    """
+    Parse an ESP-r file date, e.g. 'Wed Jan 22 10:50:52 2020'.
+    Equivalent to strptime with "%a %b %d %H:%M:%S %Y" for these dates,
+    without re-parsing the format on every call.
+    """
+    _, month, day, time, year = date.split()
+    hour, minute, second = time.split(":")
+    return datetime(
+        int(year), _MONTHS[month], int(day), int(hour), int(minute), int(second)
+    )
 
-    return var
+
+def _get_var(ifile, find_str):
+    return next((x[1] for x in ifile if x[0] == find_str), None)
 
 
 def config(filepath):
@@ -121,73 +151,76 @@ def config(filepath):
     """
     cfg = _read_file(filepath)
 
+    # Single pass through the cfg_file, mapping each keyword to its value (as
+    # _get_var would return it, so only the first occurrence is kept) and
+    # collecting the zone files between each *zon and *zend pair
+    cfg_vars = {}
+    Z = []
+    zone_vars = None
+    for x in cfg:
+        value = x[1] if len(x) > 1 else None
+        cfg_vars.setdefault(x[0], value)
+        if x[0] == "*zon":
+            zone_vars = {}
+        elif x[0] == "*zend" and zone_vars is not None:
+            # Add files to dictionary
+            iz_files = {
+                "opr": zone_vars.get("*opr"),
+                "geo": zone_vars.get("*geo"),
+                "con": zone_vars.get("*con"),
+                "tmc": zone_vars.get("*tmc"),
+            }
+
+            # Append to list, with zone no.
+            Z.append([int(zone_vars["*zon"]), iz_files])
+            zone_vars = None
+            continue
+        if zone_vars is not None:
+            zone_vars.setdefault(x[0], value)
+
     # Modified date
-    date = _get_var(cfg, "*date")  # string
-    date = datetime.strptime(date, "%a %b %d %H:%M:%S %Y")  # datetime
+    date = cfg_vars.get("*date")  # string
+    date = _parse_espr_date(date)  # datetime
 
     # Build dictionary of model paths
     paths = {
-        "zones": _get_var(cfg, "*zonpth"),
-        "networks": _get_var(cfg, "*netpth"),
-        "controls": _get_var(cfg, "*ctlpth"),
-        "aim": _get_var(cfg, "*aimpth"),
-        "radiance": _get_var(cfg, "*radpth"),
-        "images": _get_var(cfg, "*imgpth"),
-        "documents": _get_var(cfg, "*docpth"),
-        "databases": _get_var(cfg, "*dbspth"),
-        "hvac": _get_var(cfg, "*hvacpth"),
-        "BASESIMP": _get_var(cfg, "*bsmpth"),
+        "zones": cfg_vars.get("*zonpth"),
+        "networks": cfg_vars.get("*netpth"),
+        "controls": cfg_vars.get("*ctlpth"),
+        "aim": cfg_vars.get("*aimpth"),
+        "radiance": cfg_vars.get("*radpth"),
+        "images": cfg_vars.get("*imgpth"),
+        "documents": cfg_vars.get("*docpth"),
+        "databases": cfg_vars.get("*dbspth"),
+        "hvac": cfg_vars.get("*hvacpth"),
+        "BASESIMP": cfg_vars.get("*bsmpth"),
     }
 
     # Build dictionary of model databases
     # TODO(j.allison): If non-standard db, gets different name
     # should pull into a single db
     databases = {
-        "std_material": _get_var(cfg, "*stdmat"),
-        "material": _get_var(cfg, "*mat"),
-        "cfc": _get_var(cfg, "*stdcfcdb"),
-        "std_mlc": _get_var(cfg, "*stdmlc"),
-        "mlc": _get_var(cfg, "*mlc"),
-        "optics": _get_var(cfg, "*stdopt"),
-        "pressure": _get_var(cfg, "*stdprs"),
-        "devn": _get_var(cfg, "*stdevn"),
-        "climate": _get_var(cfg, "*stdclm"),
-        "mscl": _get_var(cfg, "*stdmscldb"),
-        "mould": _get_var(cfg, "*stdmould"),
-        "plant": _get_var(cfg, "*stdpdb"),
-        "sbem": _get_var(cfg, "*stdsbem"),
-        "predef": _get_var(cfg, "*stdpredef"),
+        "std_material": cfg_vars.get("*stdmat"),
+        "material": cfg_vars.get("*mat"),
+        "cfc": cfg_vars.get("*stdcfcdb"),
+        "std_mlc": cfg_vars.get("*stdmlc"),
+        "mlc": cfg_vars.get("*mlc"),
+        "optics": cfg_vars.get("*stdopt"),
+        "pressure": cfg_vars.get("*stdprs"),
+        "devn": cfg_vars.get("*stdevn"),
+        "climate": cfg_vars.get("*stdclm"),
+        "mscl": cfg_vars.get("*stdmscldb"),
+        "mould": cfg_vars.get("*stdmould"),
+        "plant": cfg_vars.get("*stdpdb"),
+        "sbem": cfg_vars.get("*stdsbem"),
+        "predef": cfg_vars.get("*stdpredef"),
     }
 
     # Control file
-    ctl = _get_var(cfg, "*ctl")
+    ctl = cfg_vars.get("*ctl")
 
     # Assessment year
-    year = _get_var(cfg, "*year")
-
-    # Get index numbers of list elements for begin of each zone desc.
-    idx_zone_begin = [ind for ind, x in enumerate(cfg) if x[0] == "*zon"]
-    idx_zone_end = [ind for ind, x in enumerate(cfg) if x[0] == "*zend"]
-    n_zones = len(idx_zone_begin)
-
-    # loop through each 'slide' of the cfg_file for the various zone files
-    Z = []
-    for i in range(n_zones):
-        cfg_slice = cfg[idx_zone_begin[i] : idx_zone_end[i]]
-
-        # Get zone no.
-        iz_zone = _get_var(cfg_slice, "*zon")
-
-        # Add files to dictionary
-        iz_files = {
-            "opr": _get_var(cfg_slice, "*opr"),
-            "geo": _get_var(cfg_slice, "*geo"),
-            "con": _get_var(cfg_slice, "*con"),
-            "tmc": _get_var(cfg_slice, "*tmc"),
-        }
-
-        # Append to list
-        Z.append([int(iz_zone), iz_files])
+    year = cfg_vars.get("*year")
 
     # If list is empty return NoneType
     if not Z:
@@ -213,7 +246,8 @@ def geometry(filepath):
     Returns the last modified date.
 
     Returns a list of the vertices, where each element is a list of floats
-    specifying the x, y, z coordinate in space.
+    specifying the x, y, z coordinate in space. The same coordinates are also
+    returned as a contiguous (n, 3) float64 array, "vertex_array".
 
     Returns a list of the surface edges, where each element is a list of ints
     specifying the vertex numbers that make up the surface.
@@ -231,69 +265,82 @@ def geometry(filepath):
 
     # Modified date
     date = _get_var(geo, "*date")  # string
-    date = datetime.strptime(date, "%a %b %d %H:%M:%S %Y")  # datetime
+    date = _parse_espr_date(date)  # datetime
 
     # Zone description
     desc = " ".join(geo[2])
 
-    # Need to re-split file to access items with comma following keyword
-    file2 = []
+    # Scan through list and gather vertices, surface edges and surface props,
+    # splitting the keyword from items with a comma following it as we go
+    buckets = {"*vertex": [], "*edges": [], "*surf": []}
+    base_list = None
     for x in geo:
-        file_split = x[0].split(",", 1)
-        if file_split:
-            file2.append(file_split)
-
-    # Scan through list and get vertices, surface edges and surface props
-    vertices = []
+        key, _, items = x[0].partition(",")
+        bucket = buckets.get(key)
+        if bucket is not None:
+            bucket.append(items)
+        elif key == "*base_list" and base_list is None:
+            base_list = x
+    vertex_strs = buckets["*vertex"]
+    # sep. no. of edges from list of vertices
+    edge_strs = [x.split(",", 1)[1] for x in buckets["*edges"]]
+    props = [x.split(",") for x in buckets["*surf"]]
+    child_verts = [None] * len(props)
+
+    # Parse all coordinates, then all vertex numbers, in one go each.
+    vertex_array = np.fromstring(",".join(vertex_strs), sep=",").reshape(-1, 3)
+    vertices = vertex_array.tolist()
+    vertex_nums = np.fromstring(",".join(edge_strs), sep=",", dtype=np.int64).tolist()
     edges = []
-    props = []
-    child_verts = []
-    for x in file2:
-        if x[0] == "*vertex":
-            vertices.append([float(y) for y in x[1].split(",")])
-        elif x[0] == "*edges":
-            dat = x[1].split(",", 1)  # sep. no. of edges from list of vertices
-            edges.append([int(y) for y in dat[1].split(",")])
-        elif x[0] == "*surf":
-            props.append(x[1].split(","))
-        child_verts.append(None)
+    start = 0
+    for edge_str in edge_strs:
+        end = start + edge_str.count(",") + 1
+        edges.append(vertex_nums[start:end])
+        start = end
+
+    # Vertex coordinates of each surface, and index of each surface name (the
+    # first, if a name is repeated), in one pass.
+    surf_verts = []
+    surf_index = {}
+    for i, (surface, prop) in enumerate(zip(edges, props)):
+        surf_verts.append([vertices[vertex - 1] for vertex in surface])
+        surf_index.setdefault(prop[0], i)
 
     # Assemble lists of child vertices for each surface.
     for i, prop in enumerate(props):
-        if prop[2] != '-':
-            try:
-                iParent = [a[0] for a in props].index(prop[2])
-            except ValueError:
-                # print('Warning: parent surface '+prop[2]+' for child '+prop[0]+' does not exist')
-                pass
-            else:
-                if not child_verts[iParent]:
-                    child_verts[iParent] = []
-                child_verts[iParent].append(pos_from_vert_num_list(vertices,edges[i]))
-
-    areas = []
-    components = []
-    for i, surface in enumerate(edges):
-        vertices_surf_i = pos_from_vert_num_list(vertices, surface)
-        components.append(plot.Component(props[i], child_verts[i], vertices_surf_i))
-        areas.append(area(vertices_surf_i))
+        parent = prop[2]
+        if parent == '-':
+            continue
+        iParent = surf_index.get(parent)
+        if iParent is None:
+            # print('Warning: parent surface '+parent+' for child '+prop[0]+' does not exist')
+            continue
+        siblings = child_verts[iParent]
+        if siblings is None:
+            siblings = child_verts[iParent] = []
+        siblings.append(surf_verts[i])
+
+    # Components are created once all child vertices are known, as a child
+    # surface can follow its parent.
+    components = [
+        plot.Component(prop, child_verts[i], surf_verts[i])
+        for i, prop in enumerate(props)
+    ]
+    areas = surface_areas(vertex_array, edges)
 
     # get base area
-    base_list = [x for x in geo if x[0].split(",")[0] == "*base_list"][0]
     # print(base_list)
-    # get base_list type
-    # TODO(j.allison): test length of base instead of try and except
-    try:
-        bl_type = base_list[1].split(" ")[1]
-    except:
+    # get base_list type, from the items following the keyword if present
+    parts = base_list[1].split(" ") if len(base_list) > 1 else []
+    if len(parts) > 1:
+        bl_type = parts[1]
+    else:
         bl_type = base_list[0].split(",")[-1]
 
     # base area via list
     if bl_type == "2":
         idx_surfaces = base_list[0].split(",")[2:-1]
-        area_base = 0
-        for surface in idx_surfaces:
-            area_base += areas[int(surface) - 1]
+        area_base = sum([areas[int(surface) - 1] for surface in idx_surfaces])
     # manual base area
     elif bl_type == "0":
         area_base = 1
@@ -305,6 +352,7 @@ def geometry(filepath):
         "desc": desc,
         "date": date,
         "vertices": vertices,
+        "vertex_array": vertex_array,
         "edges": edges,
         "props": props,
         "areas": areas,
@@ -313,25 +361,98 @@ def geometry(filepath):
     }
 
 
+def _file_id(filepath):
+    """
+    Identifies the current contents of a file for the read caches: its path,
+    modification time, size and inode. Together these also catch a file
+    replaced within the mtime granularity, or renamed into place with its
+    mtime preserved.
+    """
+    stat = os.stat(filepath)
+    return (os.path.abspath(filepath), stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+@lru_cache(maxsize=64)
+def _geometry_lru(file_id):
+    return geometry(file_id[0])
+
+
+def geometry_cached(filepath):
+    """
+    geometry(filepath), re-using the result of an earlier call if the file
+    has not changed since.
+
+    The result is shared between calls, so must not be modified; use
+    geometry(...) for a private copy.
+    """
+    return _geometry_lru(_file_id(filepath))
+
+
+@lru_cache(maxsize=16)
+def _config_lru(file_id):
+    return config(file_id[0])
+
+
+def config_cached(filepath):
+    """
+    config(filepath), re-using the result of an earlier call if the file
+    has not changed since.
+
+    The result is shared between calls, so must not be modified; use
+    config(...) for a private copy.
+    """
+    return _config_lru(_file_id(filepath))
+
+
+def _read_con_values(con_data, pos):
+    """
+    Reads a comma separated list of values from construction file data,
+    starting at line pos and continuing over following lines while a line ends
+    in a comma. Returns the values and the index of the next line.
+    """
+    values = []
+    row = con_data[pos][0]
+    while row.endswith(","):
+        values += row[:-1].split(",")
+        pos += 1
+        row = con_data[pos][0]
+    values += row.split(",")
+    return [float(x) for x in values], pos + 1
+
+
 def constructions(con_file, geo_file):
-    """Get data from construction file."""
+    """Get data from construction file.
 
-    geo_data = geometry(geo_file)
+    As well as nested lists, layer properties are returned as a structured
+    array ("layers", dtype LAYER_DTYPE) with one row per layer in file order.
+    The layers of construction i are layers[layer_offsets[i]:layer_offsets[i + 1]].
+    "layers" is None if the file's layers do not all have the same number of
+    values.
+    """
+
+    geo_data = geometry_cached(geo_file)
     con_data = _read_file(con_file)
 
     # Number of surfaces in zone
     n_cons = len(geo_data["edges"])
 
-    # Get number of layers and air gaps in each construction
-    n_layers_con = []
-    for i in range(n_cons):
-        n_layers_con.append([int(con_data[i][0].split(",")[0])] + [int(con_data[i][1])])
-    total_layers = sum([x[0] for x in n_layers_con])
-
+    # Get number of layers and air gaps in each construction, along with the
+    # running total of layers (end index of each construction's layers) and
+    # the number of constructions with air gaps, in one pass.
     # The start of the construction data is dependent on the number of constructions
     # with air gaps in the zone
     # i.e. n_surfaces + n_surf_with_airgaps = start index of construction layers
-    n_con_air_gaps = sum([1 if x[1] > 0 else 0 for x in n_layers_con])
+    n_layers_con = []
+    nidx = []
+    total_layers = 0
+    n_con_air_gaps = 0
+    for row in con_data[:n_cons]:
+        n_layers, n_gaps = int(row[0].split(",")[0]), int(row[1])
+        n_layers_con.append([n_layers, n_gaps])
+        total_layers += n_layers
+        nidx.append(total_layers)
+        if n_gaps > 0:
+            n_con_air_gaps += 1
 
     # Get air gap data (these can be of varying length or none at all)
     air_gap_props = []
@@ -347,70 +468,55 @@ def constructions(con_file, geo_file):
             )
             j += 1
 
-    # Read all layers
+    # Read all layers, parsing the values of every layer in one go
+    layer_rows = con_data[n_cons + n_con_air_gaps : n_cons + n_con_air_gaps + total_layers]
+    layer_array = np.fromstring(
+        ",".join([f"{row[0].split(',')[0]},{row[1]}" for row in layer_rows]), sep=","
+    )
+    layer_values = layer_array.tolist()
+    # Number of values in each layer row
+    layer_counts = [row[1].count(",") + 2 for row in layer_rows]
+    if all(count == len(LAYER_DTYPE) for count in layer_counts):
+        # Every layer has one value per field, so view the values as records.
+        layers = layer_array.view(LAYER_DTYPE)
+    else:
+        layers = None
     layer_therm_props_all = []
-    for i in range(n_cons + n_con_air_gaps, n_cons + n_con_air_gaps + total_layers):
-        layer_therm_props_all.append(
-            [float(con_data[i][0].split(",")[0])]
-            # + [float(x) for x in con_data[i][1].split(",")]
-            + split_to_float(con_data[i][1])
-        )
-
-    nidx = list(accumulate([x[0] for x in n_layers_con]))
-    layer_therm_props = [layer_therm_props_all[: nidx[0]]]  # first con
-    # Rest of cons
-    for i in range(n_cons - 1):
-        layer_therm_props.append(layer_therm_props_all[nidx[i] : nidx[i + 1]])
-
-    # Read emissivities
-    j = 0
-    e_in = con_data[n_cons + n_con_air_gaps + total_layers + j][0].split(",")
-    while e_in[-1] == "":
-        j += 1
-        e_in = e_in[:-1]
-        e_in += con_data[n_cons + n_con_air_gaps + total_layers + j][0].split(",")
-    e_in = [float(x) for x in e_in]
-
-    j += 1
-    e_out = con_data[n_cons + n_con_air_gaps + total_layers + j][0].split(",")
-    while e_out[-1] == "":
-        j += 1
-        e_out = e_out[:-1]
-        e_out += con_data[n_cons + n_con_air_gaps + total_layers + j][0].split(",")
-    e_out = [float(x) for x in e_out]
-
-    # Read absorptivities
-    j += 1
-    a_in = con_data[n_cons + n_con_air_gaps + total_layers + j][0].split(",")
-    while a_in[-1] == "":
-        j += 1
-        a_in = a_in[:-1]
-        a_in += con_data[n_cons + n_con_air_gaps + total_layers + j][0].split(",")
-    a_in = [float(x) for x in a_in]
-
-    j += 1
-    a_out = con_data[n_cons + n_con_air_gaps + total_layers + j][0].split(",")
-    while a_out[-1] == "":
-        j += 1
-        a_out = a_out[:-1]
-        a_out += con_data[n_cons + n_con_air_gaps + total_layers + j][0].split(",")
-    a_out = [float(x) for x in a_out]
-
-    # Append emissivities and solar absorpt to layer construction
-    layer_therm_props = list(layer_therm_props)
+    start = 0
+    for count in layer_counts:
+        end = start + count
+        layer_therm_props_all.append(layer_values[start:end])
+        start = end
+
+    # Split layers by construction
+    layer_therm_props = [
+        layer_therm_props_all[a:b] for a, b in zip([0] + nidx, nidx)
+    ]
+
+    # Read emissivities, then absorptivities, each following on from the last
+    pos = n_cons + n_con_air_gaps + total_layers
+    e_in, pos = _read_con_values(con_data, pos)
+    e_out, pos = _read_con_values(con_data, pos)
+    a_in, pos = _read_con_values(con_data, pos)
+    a_out, pos = _read_con_values(con_data, pos)
+
+    # Append emissivities and solar absorpt to layer construction: outside
+    # values to the first layer, inside values to the last, None in between
     for i, con_props in enumerate(layer_therm_props):
-        for j, _ in enumerate(con_props):
-            if j == 0:
-                layer_therm_props[i][j] += [e_out[i], a_out[i]]
-            elif j == (len(con_props) - 1):
-                layer_therm_props[i][j] += [e_in[i], a_in[i]]
-            else:
-                layer_therm_props[i][j] += [None, None]
+        if not con_props:
+            continue
+        con_props[0] += [e_out[i], a_out[i]]
+        for layer in con_props[1:-1]:
+            layer += [None, None]
+        if len(con_props) > 1:
+            con_props[-1] += [e_in[i], a_in[i]]
     # print("debug")
     return {
         "n_layers_con": n_layers_con,
         "air_gap_props": air_gap_props,
         "layer_therm_props": layer_therm_props,
+        "layers": layers,
+        "layer_offsets": np.array([0] + nidx, dtype=np.intp),
     }
 
 
@@ -426,38 +532,40 @@ def controls(filepath):
         description_zone = " ".join(ctl[2])
         n_ctl = int(ctl[3][0])
         idx = 4  # start of Control function 1
-        for i_ctl in range(n_ctl):
-            ctl_data.append([])
-            start_times.append([])
-            laws.append([])
-            valid.append([])
-            periods.append([])
+        for _ in range(n_ctl):
+            # Lists for this control function
+            ctl_data_i, start_times_i, laws_i, valid_i, periods_i = ([] for i in range(5))
+            ctl_data.append(ctl_data_i)
+            start_times.append(start_times_i)
+            laws.append(laws_i)
+            valid.append(valid_i)
+            periods.append(periods_i)
             sensors.append(space_data_to_list(ctl[idx + 1]))
             actuators.append(space_data_to_list(ctl[idx + 2]))
             i_daytypes = int(ctl[idx + 3][0])
             if i_daytypes == 0:
                 i_daytypes = 4  # calendar daytypes
             daytypes.append(i_daytypes)
-            for i_daytype in range(daytypes[i_ctl]):
-                ctl_data[i_ctl].append([])
-                start_times[i_ctl].append([])
-                laws[i_ctl].append([])
-                valid[i_ctl].append([int(x) for x in ctl[idx + 4]])
-                periods[i_ctl].append(int(ctl[idx + 5][0]))
-                for _ in range(periods[i_ctl][i_daytype]):
+            for _ in range(i_daytypes):
+                # Lists for this daytype
+                ctl_data_ij, start_times_ij, laws_ij = [], [], []
+                ctl_data_i.append(ctl_data_ij)
+                start_times_i.append(start_times_ij)
+                laws_i.append(laws_ij)
+                valid_i.append([int(x) for x in ctl[idx + 4]])
+                n_periods = int(ctl[idx + 5][0])
+                periods_i.append(n_periods)
+                for _ in range(n_periods):
                     # n_type = int(ctl[10][0])  # unknown use for type
-                    laws[i_ctl][i_daytype].append(int(ctl[idx + 6][1].split(" ")[0]))
-                    start_times[i_ctl][i_daytype].append(
-                        float(ctl[idx + 6][1].split(" ")[-1])
-                    )
+                    law_start = ctl[idx + 6][1].split(" ")
+                    laws_ij.append(int(law_start[0]))
+                    start_times_ij.append(float(law_start[-1]))
                     n_items = int(float(ctl[idx + 7][0]))
                     if n_items > 0:
-                        ctl_data[i_ctl][i_daytype].append(
-                            space_data_to_list(ctl[idx + 8], "float")
-                        )
+                        ctl_data_ij.append(space_data_to_list(ctl[idx + 8], "float"))
                         idx += 3  # 3 data rows per period
                     else:
-                        ctl_data[i_ctl][i_daytype].append(None)
+                        ctl_data_ij.append(None)
                         idx += 2  # 2 raws when no data items
                 idx += 2
             idx += 4
@@ -483,10 +591,30 @@ def pos_from_vert_num_list(vertices_zone, edges):
     from the zone vertices and their indices as defined in
     the edges list
     """
-    vertices_surf = []
-    for vertex in edges:
-        vertices_surf.append(vertices_zone[vertex - 1])
-    return vertices_surf
+    return [vertices_zone[vertex - 1] for vertex in edges]
+
+
+def _read_weather(file_path, header_lines, temp_col, solar_diff_col):
+    """Read the hourly values of an ESP-r ascii weather file.
+
+    Every 25th line after the header is a day marker and is skipped. The
+    first six fields of each remaining line are parsed into a (hours, 6)
+    array; any further (e.g. empty trailing) fields are ignored.
+    """
+    with open(file_path, "r", buffering=_READ_BUFFER) as fp:
+        lines = fp.read().splitlines()[header_lines:]
+    hours = [line for i, line in enumerate(lines) if (i % 25) != 24]
+    values = np.loadtxt(
+        hours, delimiter=",", usecols=range(6), comments=None, ndmin=2
+    )
+    return {
+        "solar_diff": values[:, solar_diff_col].tolist(),
+        "temp_db": (values[:, temp_col] / 10.0).tolist(),
+        "solar_direct": values[:, 2].tolist(),
+        "wind_speed": (values[:, 3] / 10.0).tolist(),
+        "wind_direction": values[:, 4].tolist(),
+        "humidity_relative": values[:, 5].tolist(),
+    }
 
 
 def weather(file_path):
@@ -500,69 +628,13 @@ def weather(file_path):
     col 6: Relative humidity               (%)
 
     """
-    solar_diff = []
-    temp_db = []
-    solar_direct = []
-    wind_speed = []
-    wind_direction = []
-    humidity_relative = []
-    header_lines = 13
-    with open(file_path, "r") as csvfile:
-        data = csv.reader(csvfile, delimiter=",")
-        for _ in range(header_lines):
-            next(data, None)
-        i = 0
-        for row in data:
-            if (i % 25) != 24:
-                solar_diff.append(float(row[0]))
-                temp_db.append(float(row[1]) / 10.0)
-                solar_direct.append(float(row[2]))
-                wind_speed.append(float(row[3]) / 10.0)
-                wind_direction.append(float(row[4]))
-                humidity_relative.append(float(row[5]))
-            i += 1
-    return {
-        "solar_diff": solar_diff,
-        "temp_db": temp_db,
-        "solar_direct": solar_direct,
-        "wind_speed": wind_speed,
-        "wind_direction": wind_direction,
-        "humidity_relative": humidity_relative,
-    }
+    return _read_weather(file_path, 13, temp_col=1, solar_diff_col=0)
 
 
 def weather_v2(file_path):
     """Read ESP-r ascii weather file.
     """
-    solar_diff = []
-    temp_db = []
-    solar_direct = []
-    wind_speed = []
-    wind_direction = []
-    humidity_relative = []
-    header_lines = 15
-    with open(file_path, "r") as csvfile:
-        data = csv.reader(csvfile, delimiter=",")
-        for _ in range(header_lines):
-            next(data, None)
-        i = 0
-        for row in data:
-            if (i % 25) != 24:
-                solar_diff.append(float(row[1]))
-                temp_db.append(float(row[0]) / 10.0)
-                solar_direct.append(float(row[2]))
-                wind_speed.append(float(row[3]) / 10.0)
-                wind_direction.append(float(row[4]))
-                humidity_relative.append(float(row[5]))
-            i += 1
-    return {
-        "solar_diff": solar_diff,
-        "temp_db": temp_db,
-        "solar_direct": solar_direct,
-        "wind_speed": wind_speed,
-        "wind_direction": wind_direction,
-        "humidity_relative": humidity_relative,
-    }
+    return _read_weather(file_path, 15, temp_col=0, solar_diff_col=1)
 
     
 def zone_to_predef_entity(geo_file, name, desc, category):
@@ -578,39 +650,44 @@ def zone_to_predef_entity(geo_file, name, desc, category):
     # TODO(j.allison): Process visual entities
     # TODO(j.allison): Shift x,y,z to (0,0,0) origin
 
-    geo = geometry(geo_file)
-    all_vertices = geo["vertices"]
+    geo = geometry_cached(geo_file)
     props = geo["props"]
     surfaces = geo["edges"]
-    vx = [v[0] for v in all_vertices]
-    vy = [v[1] for v in all_vertices]
-    vz = [v[2] for v in all_vertices]
-    size = (max(vx) - min(vx), max(vy) - min(vy), max(vz) - min(vz))
+    V = geo["vertex_array"]
+    size = tuple((V.max(axis=0) - V.min(axis=0)).tolist())
 
     out_file = f"{name}.txt"
-    with open(out_file, "w+") as the_file:
-        the_file.write(f"*item,{name},{desc} # tag name menu entry\n")
-        the_file.write(f"*incat,{category}           \n")
-        the_file.write("*sourced,Custom built.\n")
-        the_file.write("*origin,0.0,0.0,0.0  # local origin\n")
-        the_file.write(
-            f"*bounding_box,  {size[0]:.3f}  {size[1]:.3f}  {size[2]:.3f}  # extents of object\n"
+    buf = []
+    append = buf.append
+    append(f"*item,{name},{desc} # tag name menu entry\n")
+    append(f"*incat,{category}           \n")
+    append("*sourced,Custom built.\n")
+    append("*origin,0.0,0.0,0.0  # local origin\n")
+    append(
+        f"*bounding_box,  {size[0]:.3f}  {size[1]:.3f}  {size[2]:.3f}  # extents of object\n"
+    )
+    append("*Text\n")
+    append(f"{desc}\n")
+    append("*End_text\n")
+    append("#\n")
+    vertex_block = StringIO()
+    np.savetxt(
+        vertex_block,
+        np.column_stack((V, np.arange(1, len(V) + 1))),
+        fmt="*vertex,%.5f,%.5f,%.5f  #   %d",
+    )
+    append(vertex_block.getvalue())
+    append("#\n")
+    append(
+        "".join(
+            f"*mass,{p[0]},{p[5]},OPAQUE,{len(s)},{'  '.join(map(str, s))}  #   {i}\n"
+            for i, (s, p) in enumerate(zip(surfaces, props), 1)
         )
-        the_file.write("*Text\n")
-        the_file.write(f"{desc}\n")
-        the_file.write("*End_text\n")
-        the_file.write("#\n")
-        for i, vertex in enumerate(all_vertices):
-            the_file.write(
-                f"*vertex,{vertex[0]:.5f},{vertex[1]:.5f},{vertex[2]:.5f}  #   {i + 1}\n"
-            )
-        the_file.write("#\n")
-        for i, (s, p) in enumerate(zip(surfaces, props)):
-            the_file.write(
-                f"*mass,{p[0]},{p[5]},OPAQUE,{len(s)},"
-                + "  ".join(map(str, s))
-                + f"  #   {i + 1}\n"
-            )
-        the_file.write("#\n")
-        # the_file.write(f"*vobject,{name},{desc},{len(self.vis)},{','.join([v[8] for v in self.vis])}")
-        the_file.write("*end_item")
+    )
+    append("#\n")
+    # append(f"*vobject,{name},{desc},{len(self.vis)},{','.join([v[8] for v in self.vis])}")
+    append("*end_item")
+
+    # Write out in one go
+    with open(out_file, "w") as the_file:
+        the_file.write("".join(buf))
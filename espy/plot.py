@@ -16,9 +16,11 @@ import numpy as np
 from mpl_toolkits.mplot3d.art3d import Line3DCollection, Poly3DCollection
 from espy import get
 from wand.image import Image
-import math
-from collections import Counter
+from collections import defaultdict
+from functools import lru_cache
 import vtk
+from vtk.util import numpy_support
+from espy._kernels import as_polygon, newell_normal
 
 # pylint: disable-msg=C0103
 
@@ -339,7 +341,7 @@ def plot_zone(geo_file, ax=None, show_roof=True):
                 plot_zone_surface(vs, ax=ax, facecolour="#008db0")
 
 
-def plot_construction(con_data, vertices_surf, ax=None):
+def plot_construction(con_data, vertices_surf, ax=None, normal=None):
     """Plot 3D construction.
     
     Arguments
@@ -351,13 +353,16 @@ def plot_construction(con_data, vertices_surf, ax=None):
             e.g. [[0., 0., 0.],[0., 1., 0.],...]
         ax: matplotlib.axes.Axes
             e.g. output from plt.gca()
+        normal: list (3), float; default None
+            normal of vertices_surf if already known, otherwise calculated
 
     Returns
         None
     """
     con_data.reverse()
     thickness = [x[3] for x in con_data]
-    normal = get.calculate_normal(vertices_surf)
+    if normal is None:
+        normal = calculate_normal(vertices_surf)
     start = 0
     for i, _ in enumerate(con_data):
         a4 = vertices_surf + [vertices_surf[0]]
@@ -549,15 +554,15 @@ def plot_building_component(geo_file, con_file, idx_surface, ax=None, show_roof=
     con = get.constructions(con_file, geo_file)
     layer_therm_props = con["layer_therm_props"]
     con_data = layer_therm_props[idx_surface]
+    normal = calculate_normal(vertices_surf)
     if (surface_props[1] == "CEIL" or surface_props[1] == "SLOP") and not show_roof:
         pass
     else:
-        plot_construction(con_data, vertices_surf, ax=ax)
+        plot_construction(con_data, vertices_surf, ax=ax, normal=normal)
 
     # -------------------------------------
     # Plot outer surface
     # -------------------------------------
-    normal = get.calculate_normal(vertices_surf)
     # vertices_surf += [vertices_surf[0]]
     total_thickness = sum([x[3] for x in con_data])
     # Extend vertex position along surface normal by the total thickness
@@ -665,6 +670,28 @@ def vtk_view(actors, edge_actors, outlines):
     renderWindowInteractor.Start()
 
 
+@lru_cache(maxsize=None)
+def html_colour_to_rgb(colour):
+    """Convert an HTML colour to VTK RGB floats, memoised per colour string.
+
+    Arguments
+        colour: str
+            e.g. "#f5f2d0", or a colour name such as "red"
+
+    Returns
+        rgb: tuple (3), float
+            each component in range 0-1
+    """
+    hex_colour = colour.strip()
+    if len(hex_colour) == 7 and hex_colour[0] == "#":
+        try:
+            return tuple(int(hex_colour[i : i + 2], 16) / 255 for i in (1, 3, 5))
+        except ValueError:
+            pass
+    # Anything other than #rrggbb is left to VTK to interpret.
+    return tuple(x / 255 for x in vtk.vtkNamedColors().HTMLColorToRGB(colour))
+
+
 def generate_vtk_actors(surf_obj, outer_colour, show_edges=False, show_outline=True):
     """Generates 3 VTK actors.
 
@@ -701,35 +728,29 @@ def generate_vtk_actors(surf_obj, outer_colour, show_edges=False, show_outline=T
         plot.vtk_view(sas,eas,oas)
 
     """
-    colors = vtk.vtkNamedColors()
+    port = surf_obj.GetOutputPort()
 
     # Create a mapper and actor
     mapper = vtk.vtkPolyDataMapper()
-    mapper.SetInputConnection(surf_obj.GetOutputPort())
+    mapper.SetInputConnection(port)
     surface_actor = vtk.vtkActor()
     surface_actor.SetMapper(mapper)
 
-    # Get outline of surface
-    outline = vtk.vtkFeatureEdges()
-    outline.SetInputConnection(surf_obj.GetOutputPort())
-
-    # Get triangulation (mesh) of surface
-    extract = vtk.vtkExtractEdges()
-    extract.SetInputConnection(surf_obj.GetOutputPort())
-
     # Define format of surface
-    surface_actor.GetProperty().SetColor(
-        [x / 255 for x in colors.HTMLColorToRGB(outer_colour[0])]
-    )
-    surface_actor.GetProperty().SetOpacity(outer_colour[1])
+    prop = surface_actor.GetProperty()
+    prop.SetColor(html_colour_to_rgb(outer_colour[0]))
+    prop.SetOpacity(outer_colour[1])
 
     # Remove lighting, reflections etc.
-    surface_actor.GetProperty().SetAmbient(1.0)
-    surface_actor.GetProperty().SetDiffuse(0.0)
-    surface_actor.GetProperty().SetSpecular(0.0)
+    prop.SetAmbient(1.0)
+    prop.SetDiffuse(0.0)
+    prop.SetSpecular(0.0)
 
     # Define format of mesh
     if show_edges:
+        # Get triangulation (mesh) of surface
+        extract = vtk.vtkExtractEdges()
+        extract.SetInputConnection(port)
         tubes = vtk.vtkTubeFilter()
         tubes.SetInputConnection(extract.GetOutputPort())
         tubes.SetRadius(0.02)
@@ -738,17 +759,21 @@ def generate_vtk_actors(surf_obj, outer_colour, show_edges=False, show_outline=T
         mapEdges.SetInputConnection(tubes.GetOutputPort())
         edge_actor = vtk.vtkActor()
         edge_actor.SetMapper(mapEdges)
-        edge_actor.GetProperty().SetColor(0, 0.643, 0.706)
-        edge_actor.GetProperty().SetSpecularColor(1, 1, 1)
-        edge_actor.GetProperty().SetSpecular(0.3)
-        edge_actor.GetProperty().SetSpecularPower(20)
-        edge_actor.GetProperty().SetAmbient(0.2)
-        edge_actor.GetProperty().SetDiffuse(0.8)
+        prop = edge_actor.GetProperty()
+        prop.SetColor(0, 0.643, 0.706)
+        prop.SetSpecularColor(1, 1, 1)
+        prop.SetSpecular(0.3)
+        prop.SetSpecularPower(20)
+        prop.SetAmbient(0.2)
+        prop.SetDiffuse(0.8)
     else:
         edge_actor = None
 
     # Define format of outline
     if show_outline:
+        # Get outline of surface
+        outline = vtk.vtkFeatureEdges()
+        outline.SetInputConnection(port)
         outline.SetFeatureEdges(False)
         # ManifoldEdgesOff, NonManifoldEdgesOff, BoundaryEdgesOn
         outline.ColoringOff()
@@ -760,18 +785,94 @@ def generate_vtk_actors(surf_obj, outer_colour, show_edges=False, show_outline=T
         outline_mapEdges.SetInputConnection(outline_tubes.GetOutputPort())
         outline_actor = vtk.vtkActor()
         outline_actor.SetMapper(outline_mapEdges)
-        outline_actor.GetProperty().SetColor(0, 0, 0)
-        outline_actor.GetProperty().SetSpecularColor(1, 1, 1)
-        outline_actor.GetProperty().SetSpecular(0.3)
-        outline_actor.GetProperty().SetSpecularPower(20)
-        outline_actor.GetProperty().SetAmbient(0.2)
-        outline_actor.GetProperty().SetDiffuse(0.8)
+        prop = outline_actor.GetProperty()
+        prop.SetColor(0, 0, 0)
+        prop.SetSpecularColor(1, 1, 1)
+        prop.SetSpecular(0.3)
+        prop.SetSpecularPower(20)
+        prop.SetAmbient(0.2)
+        prop.SetDiffuse(0.8)
     else:
         outline_actor = None
 
     return surface_actor, edge_actor, outline_actor
 
 
+def vtk_points(coords):
+    """Copy vertex coordinates into VTK in a single array.
+
+    Arguments
+        coords: list, list (3), float
+            vertex coordinates
+            e.g. [[0., 0., 0.], [1., 0., 0], ...]
+
+    Returns
+        points: vtk.vtkPoints
+    """
+    points = vtk.vtkPoints()
+    points.SetData(
+        numpy_support.numpy_to_vtk(np.array(coords, dtype=np.float64), deep=True)
+    )
+    return points
+
+
+# numpy integer type matching vtkIdType, which is 32 or 64 bit by VTK build
+_VTK_ID_DTYPE = np.dtype(f"i{vtk.vtkIdTypeArray().GetDataTypeSize()}")
+
+
+def vtk_cells(cells):
+    """Copy polygon connectivity into VTK in a single array.
+
+    Arguments
+        cells: list, list, int
+            point ids of each polygon
+            e.g. [[0, 1, 2, 3], [4, 5, 6]]
+
+    Returns
+        polys: vtk.vtkCellArray
+    """
+    # Legacy layout: each cell is its point count followed by its point ids.
+    ids = []
+    for cell in cells:
+        ids.append(len(cell))
+        ids.extend(cell)
+    polys = vtk.vtkCellArray()
+    polys.SetCells(
+        len(cells),
+        numpy_support.numpy_to_vtkIdTypeArray(np.array(ids, dtype=_VTK_ID_DTYPE), deep=True),
+    )
+    return polys
+
+
+# Colour and opacity of component outer surfaces, by boundary type.
+_DEFAULT_COLOURS = {
+    "OPAQUE_ANOTHER": ("#F8F4FF", 1),
+    "OPAQUE_ANOTHER_WALL": ("#F8F4FF", 1),
+    "OPAQUE_ANOTHER_DOOR": ("#f5f2d0", 1),
+    "OPAQUE_ANOTHER_PARTN": ("#F8F4FF", 1),
+    "OPAQUE_ANOTHER_GRILL": ("#c19a6b", 1),
+    "OPAQUE_EXTERIOR": ("#afacac", 1),
+    "OPAQUE_EXTERIOR_WALL": ("#afacac", 1),
+    "OPAQUE_EXTERIOR_ROOF": ("#afacac", 1),
+    "OPAQUE_EXTERIOR_DOOR": ("#c19a6b", 1),
+    "OPAQUE_EXTERIOR_FRAME": ("#c19a6b", 1),
+    "OPAQUE_EXTERIOR_GRILL": ("#c19a6b", 1),
+    "TRANSP_EXTERIOR_WINDOW": ("#008db0", 0.2),
+    "OPAQUE_GROUND": ("#654321", 1),
+    "OPAQUE_GROUND_WALL": ("#654321", 1),
+    "OPAQUE_SIMILAR": ("#d8e4bc", 1),
+    "OPAQUE_SIMILAR_WALL": ("#d8e4bc", 1),
+    "OPAQUE_SIMILAR_DOOR": ("#f5f2d0", 1),
+    "OPAQUE_SIMILAR_GRILL": ("#c19a6b", 1),
+    "OPAQUE_SIMILAR_PARTN": ("#d8e4bc", 1),
+    "TRANSP_SIMILAR": ("#0000FF", 0.2),
+    "TRANSP_ANOTHER_FICT": ("#0000FF", 0.2),
+    "TRANSP_ANOTHER_WINDOW": ("#008db0", 0.2),
+    "OPAQUE_ANOTHER_FURNI": ("#838B8B", 1),
+    "OPAQUE_CONSTANT_FURNI": ("#838B8B", 1),
+}
+
+
 class Component:
     """Class defining a zone surface.
 
@@ -794,6 +895,18 @@ class Component:
             surface vertex coordinates
     """
 
+    __slots__ = (
+        "name",
+        "position",
+        "child",
+        "usage",
+        "construction",
+        "optical_type",
+        "boundary",
+        "child_verts",
+        "vertices_surf",
+    )
+
     def __init__(self, property_list, child_verts, vertices_surf):
         """Constructor.
         
@@ -857,28 +970,14 @@ class Component:
         """
 
         # Check for duplicate vertices
-        dups = [
-            k for k, v in Counter(tuple(x) for x in self.vertices_surf).items() if v > 1
-        ]
-        if not dups:
+        if not has_duplicates(self.vertices_surf):
             # Normal surface without holes
 
             # Setup points
-            points = vtk.vtkPoints()
-            for vertex in self.vertices_surf:
-                points.InsertNextPoint(vertex[0], vertex[1], vertex[2])
-
-            # Create the polygon
-            polygon = vtk.vtkPolygon()
-            polygon.GetPointIds().SetNumberOfIds(
-                len(self.vertices_surf)
-            )  # make a polygon
-            for i, _ in enumerate(self.vertices_surf):
-                polygon.GetPointIds().SetId(i, i)
-
-            # Add the polygon to a list of polygons
-            polygons = vtk.vtkCellArray()
-            polygons.InsertNextCell(polygon)
+            points = vtk_points(self.vertices_surf)
+
+            # Create the polygon, as the only cell in a list of polygons
+            polygons = vtk_cells([range(len(self.vertices_surf))])
 
             # Create a PolyData
             polygonPolyData = vtk.vtkPolyData()
@@ -919,27 +1018,25 @@ class Component:
                         x.reverse()
                         vertices_surfs_inner.append(x)
 
-            # Set up points for outside polygon.
-            points = vtk.vtkPoints()
-            polys = vtk.vtkCellArray()
-            i = 0
-            for vertex in vertices_surf_outer:
-                points.InsertPoint(i, vertex[0], vertex[1], vertex[2])
-                i += 1
+            # Set up points for outside polygon. Coordinates are collected
+            # first so that they can be copied into VTK in one go.
+            coords = list(vertices_surf_outer)
 
             # For each inner polygon, add points that aren't already in the points list,
             # and form the hole.
+            holes = []
             for vertices_surf_inner in vertices_surfs_inner:
-                poly=vtk.vtkPolygon()
+                hole = []
                 for vertex in vertices_surf_inner:
                     isin, j = is_point_in_surf(vertex, vertices_surf_outer)
                     if isin:
-                        poly.GetPointIds().InsertNextId(j)
+                        hole.append(j)
                     else:
-                        points.InsertPoint(i, vertex[0], vertex[1], vertex[2])
-                        poly.GetPointIds().InsertNextId(i)
-                        i += 1
-                polys.InsertNextCell(poly)
+                        hole.append(len(coords))
+                        coords.append(vertex)
+                holes.append(hole)
+            points = vtk_points(coords)
+            polys = vtk_cells(holes)
 
             # Define transform to rotate the surface into the X-Y plane for Delaunay filter.
             transform = vtk.vtkTransform()
@@ -1009,33 +1106,6 @@ class Component:
             plot.vtk_view(sas,eas,oas)
         """
 
-        default_colours = {
-            "OPAQUE_ANOTHER": ["#F8F4FF", 1],
-            "OPAQUE_ANOTHER_WALL": ["#F8F4FF", 1],
-            "OPAQUE_ANOTHER_DOOR": ["#f5f2d0", 1],
-            "OPAQUE_ANOTHER_PARTN": ["#F8F4FF", 1],
-            "OPAQUE_ANOTHER_GRILL": ["#c19a6b", 1],
-            "OPAQUE_EXTERIOR": ["#afacac", 1],
-            "OPAQUE_EXTERIOR_WALL": ["#afacac", 1],
-            "OPAQUE_EXTERIOR_ROOF": ["#afacac", 1],
-            "OPAQUE_EXTERIOR_DOOR": ["#c19a6b", 1],
-            "OPAQUE_EXTERIOR_FRAME": ["#c19a6b", 1],
-            "OPAQUE_EXTERIOR_GRILL": ["#c19a6b", 1],
-            "TRANSP_EXTERIOR_WINDOW": ["#008db0", 0.2],
-            "OPAQUE_GROUND": ["#654321", 1],
-            "OPAQUE_GROUND_WALL": ["#654321", 1],
-            "OPAQUE_SIMILAR": ["#d8e4bc", 1],
-            "OPAQUE_SIMILAR_WALL": ["#d8e4bc", 1],
-            "OPAQUE_SIMILAR_DOOR": ["#f5f2d0", 1],
-            "OPAQUE_SIMILAR_GRILL": ["#c19a6b", 1],
-            "OPAQUE_SIMILAR_PARTN": ["#d8e4bc", 1],
-            "TRANSP_SIMILAR": [" #0000FF", 0.2],
-            "TRANSP_ANOTHER_FICT": [" #0000FF", 0.2],
-            "TRANSP_ANOTHER_WINDOW": [" #008db0", 0.2],
-            "OPAQUE_ANOTHER_FURNI": ["#838B8B", 1],
-            "OPAQUE_CONSTANT_FURNI": ["#838B8B", 1]
-        }
-
         # Get optical _type_
         if self.optical_type == "OPAQUE":
             optics = "OPAQUE"
@@ -1058,7 +1128,7 @@ class Component:
 
         # Lookup name in colour dictionary
         # default to red if not available in default colour dictionary
-        surf_colour = default_colours.get(boundary_type)
+        surf_colour = _DEFAULT_COLOURS.get(boundary_type)
         if surf_colour is None:
             print(
                 "Unable to find default colour for component {} of type {}.".format(
@@ -1067,9 +1137,9 @@ class Component:
                 end="",
             )
             print(" Setting default colour to red.")
-            surf_colour = ["#ff0000", 1]
+            surf_colour = ("#ff0000", 1)
 
-        return surf_colour
+        return list(surf_colour)
 
 
 def is_point_in_surf(point, verts, tol = 0.0001):
@@ -1095,6 +1165,45 @@ def is_point_in_surf(point, verts, tol = 0.0001):
     return False, None
 
 
+def has_duplicates(verts):
+    """Check whether any vertex occurs more than once in a list.
+
+    Stops at the first repeated vertex.
+
+    Arguments
+        verts: list, list (3), float
+            list of vertex coordinates
+
+    Returns
+        boolean
+    """
+    seen = set()
+    for v in verts:
+        t = tuple(v)
+        if t in seen:
+            return True
+        seen.add(t)
+    return False
+
+
+def duplicate_indices(verts):
+    """Find vertices that occur more than once in a list.
+
+    Arguments
+        verts: list, list (3), float
+            list of vertex coordinates
+            e.g. [[0., 0., 0.], [1., 0., 0], ...]
+
+    Returns
+        dups: list, int
+            ascending indices of every vertex that has a duplicate
+    """
+    idx_by_v = defaultdict(list)
+    for i, v in enumerate(verts):
+        idx_by_v[tuple(v)].append(i)
+    return sorted(i for idx in idx_by_v.values() if len(idx) > 1 for i in idx)
+
+
 def get_outer_inner(verts, add_intermediate = True):
     """Separate weakly simple polygons into outer and inner.
 
@@ -1116,7 +1225,7 @@ def get_outer_inner(verts, add_intermediate = True):
             vertex coordinates for each inner polygon
     """
     # Get indices of duplicate vertices.
-    dups = [i for i, x in enumerate(verts) if verts.count(x) > 1]
+    dups = duplicate_indices(verts)
 
     if not dups: 
         # No duplicates, so we don't need to extract the outer,
@@ -1292,28 +1401,18 @@ def calculate_normal(p):
 
     Arguments
         p: list, list (3), float
-            polygon vertex coordinates
+            polygon vertex coordinates (x, y plan coordinates are taken
+            as z = 0)
 
     Returns
         nn: list (3), float
             normal direction vector
     """
 
-    normal = [0, 0, 0]
-    for i, _ in enumerate(p):
-        j = (i + 1) % len(p)
-        normal[0] += (p[i][1] - p[j][1]) * (p[i][2] + p[j][2])
-        normal[1] += (p[i][2] - p[j][2]) * (p[i][0] + p[j][0])
-        normal[2] += (p[i][0] - p[j][0]) * (p[i][1] + p[j][1])
+    normal = newell_normal(as_polygon(p))
     # normalise
-    nn = [0, 0, 0]
-    nn[0] = normal[0] / math.sqrt(
-        (normal[0]) ** 2 + (normal[1]) ** 2 + (normal[2]) ** 2)
-    nn[1] = normal[1] / math.sqrt(
-        (normal[0]) ** 2 + (normal[1]) ** 2 + (normal[2]) ** 2)
-    nn[2] = normal[2] / math.sqrt(
-        (normal[0]) ** 2 + (normal[1]) ** 2 + (normal[2]) ** 2)
-    return nn
+    nn = normal / np.linalg.norm(normal)
+    return nn.tolist()
 
 
 def std_date_axis(ax):
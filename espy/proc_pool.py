@@ -0,0 +1,155 @@
+"""Pool of pre-started ESP-r processes."""
+import os
+import time
+from subprocess import PIPE, CalledProcessError, CompletedProcess, Popen
+
+
+class ProcessPool:
+    """Keeps ESP-r processes started ahead of use.
+
+    ESP-r programs in script mode exit at the end of each script, so a process
+    cannot be handed a second job. Instead, once a process taken from the
+    pool has finished, a replacement with the same command line is started.
+    The replacement loads its model or weather file while the caller does
+    other work, so the next identical call skips the start-up cost.
+
+    Only commands that wait for a script on stdin (ESP-r '-mode script'
+    without a '-p' preset) are warmed; any other command, such as a bps
+    preset run, would do its whole job in the background, so it is started
+    fresh for each call instead.
+
+    A warm bps process has already read the whole model (zone, control,
+    climate and other files), not just its .cfg file. So for a .cfg file on
+    the command line, every file under the model root (the parent of the
+    .cfg file's directory) is recorded when the process is started; for any
+    other command, the files named on the command line are. If any of those
+    files has since been modified, added or removed, the warm process is
+    discarded and a fresh one is started instead.
+
+    Properties
+        max_idle_time: float
+            seconds after which an unused warm process is discarded
+
+    Example
+        with ProcessPool() as pool:
+            for month in range(1, 4):
+                bps.run_sim('model.cfg', f'{month}.res', 1, month, 28, month,
+                            3, 1, 'a', pool=pool)
+    """
+
+    def __init__(self, max_idle_time=300.0):
+        """Constructor.
+
+        Arguments
+            max_idle_time: float; default 300
+                seconds after which an unused warm process is discarded
+
+        Returns
+            ProcessPool object
+        """
+        self.max_idle_time = max_idle_time
+        self._idle = {}
+
+    def run(self, args, input=None, stdout=None, stderr=None, encoding=None, check=False):
+        """Run a command, using a warm process if one is available.
+
+        Accepts the subset of subprocess.run(...) arguments used by espy.
+
+        Returns
+            subprocess.CompletedProcess
+        """
+        key = (tuple(args), os.getcwd(), stdout, stderr, encoding)
+        proc = self._acquire(key)
+        out, err = proc.communicate(input)
+        if _waits_for_script(args):
+            # Warm up a replacement for the next identical call. This is done
+            # once the process has finished, so that the files it wrote are
+            # not mistaken for later edits to the model.
+            self._idle[key] = (time.time(), _snapshot(args), self._spawn(key))
+        if check and proc.returncode:
+            raise CalledProcessError(proc.returncode, proc.args, out, err)
+        return CompletedProcess(proc.args, proc.returncode, out, err)
+
+    def close(self):
+        """Terminate all warm processes."""
+        for _, _, proc in self._idle.values():
+            _discard(proc)
+        self._idle.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _acquire(self, key):
+        """Take the warm process for key, or start one if none is usable."""
+        if key in self._idle:
+            started, snapshot, proc = self._idle.pop(key)
+            if proc.poll() is None and not self._is_stale(key, started, snapshot):
+                return proc
+            _discard(proc)
+        return self._spawn(key)
+
+    def _is_stale(self, key, started, snapshot):
+        if time.time() - started > self.max_idle_time:
+            return True
+        return _snapshot(key[0]) != snapshot
+
+    @staticmethod
+    def _spawn(key):
+        args, _, stdout, stderr, encoding = key
+        return Popen(
+            list(args),
+            stdin=PIPE,
+            stdout=stdout,
+            stderr=stderr,
+            encoding=encoding,
+            close_fds=False,
+        )
+
+
+def _input_files(args):
+    """Files an ESP-r process started with args may have read.
+
+    For a .cfg file this is every file under the model root, i.e. the parent
+    of the .cfg file's directory; otherwise each file named in args.
+    """
+    for arg in args:
+        if not os.path.isfile(arg):
+            continue
+        if arg.endswith(".cfg"):
+            root = os.path.dirname(os.path.dirname(os.path.abspath(arg)))
+            for dirpath, _, filenames in os.walk(root):
+                for name in filenames:
+                    yield os.path.join(dirpath, name)
+        else:
+            yield arg
+
+
+def _snapshot(args):
+    """Modification time and size of each of the input files of args."""
+    snapshot = {}
+    for path in _input_files(args):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def _waits_for_script(args):
+    """Whether an ESP-r command line blocks reading a script from stdin.
+
+    Only such processes can be safely started ahead of use; anything else
+    (e.g. a bps preset run) would do its whole job straight away.
+    """
+    return "script" in args and "-p" not in args
+
+
+def _discard(proc):
+    """Kill a process and release its pipes."""
+    if proc.poll() is None:
+        proc.kill()
+    proc.communicate()
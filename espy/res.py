@@ -2,7 +2,7 @@
 import csv
 import itertools
 import os
-from subprocess import PIPE, run
+from subprocess import DEVNULL, PIPE, run
 
 import pandas
 
@@ -222,14 +222,14 @@ def time_series(cfg_file, res_file, param_list, out_file=None, time_fmt='DateTim
     """
 
     # Read cfg file for list of zones
-    cfg = get.config(cfg_file)
+    cfg = get.config_cached(cfg_file)
     zones = cfg["zones"]
 
     # Loop through each zone file and get zone name
     zone_names = []
     for ind, _ in enumerate(zones):
         file_path = zones[ind][1]["geo"]
-        zone_names.append(get.geometry(file_path)["name"])
+        zone_names.append(get.geometry_cached(file_path)["name"])
 
     # TODO(j.allison): Check/validate time_fmt
     res_open = ["", "c"]
@@ -332,14 +332,14 @@ def time_series(cfg_file, res_file, param_list, out_file=None, time_fmt='DateTim
     cmd = res_open + csv_open + perf_met + res_select + csv_close + res_close
     cmd = "\n".join(cmd)
     # print(cmd)
-    res = run(
+    # res writes the results to temp.csv; its console output is not needed
+    run(
         ["res", "-file", res_file, "-mode", "script"],
         input=cmd,
-        stdout=PIPE,
-        stderr=PIPE,
+        stdout=DEVNULL,
+        stderr=DEVNULL,
         encoding="ascii",
     )
-    # print(res.stdout)
 
     header_lines = 4
     if out_file:
@@ -403,14 +403,14 @@ def abovebelow(cfg_file, res_file, param_list, is_below=False, out_file=None, qu
     """
 
     # Read cfg file for list of zones
-    cfg = get.config(cfg_file)
+    cfg = get.config_cached(cfg_file)
     zones = cfg["zones"]
 
     # Loop through each zone file and get zone name
     zone_names = []
     for ind, _ in enumerate(zones):
         file_path = zones[ind][1]["geo"]
-        zone_names.append(get.geometry(file_path)["name"])
+        zone_names.append(get.geometry_cached(file_path)["name"])
 
     # TODO(j.allison): Check/validate time_fmt
     res_open = ["", "d"]
@@ -511,30 +511,21 @@ def abovebelow(cfg_file, res_file, param_list, is_below=False, out_file=None, qu
     cmd = res_open + csv_open + res_select + [str(query_point)] + res_close
     cmd = "\n".join(cmd)
     # print(cmd)
-    res = run(
+    # res writes the results to temp.csv; its console output is not needed
+    run(
         ["res", "-file", res_file, "-mode", "script"],
         input=cmd,
-        stdout=PIPE,
-        stderr=PIPE,
+        stdout=DEVNULL,
+        stderr=DEVNULL,
         encoding="ascii",
     )
-    # print(res.stdout)
 
     # Read in CSV output from ESP-r
-    data = []
     header = 9
     with open("temp.csv", "r") as file:
         reader = csv.reader(file, delimiter=",")
-        line_count = 1
-        for row in reader:
-            if line_count < header:
-                # skipping header
-                line_count += 1
-            elif line_count >= header + num_zones:
-                break
-            else:
-                data.append(row)
-                line_count += 1
+        # Skip the header lines, then take one row per zone
+        data = list(itertools.islice(reader, header - 1, header - 1 + num_zones))
     # print(data)
 
     # Remove temporary CSV file.
@@ -576,7 +567,7 @@ def abovebelow(cfg_file, res_file, param_list, is_below=False, out_file=None, qu
 def energy_balance(cfg_file, res_file, out_file=None, group=None):
     """Get zone energy balance."""
     # Read cfg file for list of zones
-    cfg = get.config(cfg_file)
+    cfg = get.config_cached(cfg_file)
     zones = cfg["zones"]
 
     # Get zone energy balance from ESP-r to temporary file
@@ -589,24 +580,16 @@ def energy_balance(cfg_file, res_file, out_file=None, group=None):
     cmd = "\n".join(cmd_open + cmd_group + cmd_zone_bal)
     run(
         ["res", "-file", res_file, "-mode", "script"],
-        stdout=PIPE,
+        stdout=DEVNULL,
         input=cmd,
         encoding="ascii",
         check=True,
     )
 
-    # Read CSV from ESP-r
-    data = []
-    for i in range(len(zones)):
-        with open("temp.csv", "r") as file:
-            reader = csv.reader(file, delimiter=",")
-            data.append(
-                [
-                    row
-                    for idx, row in enumerate(reader)
-                    if idx in range(19 * i + 6, 19 * i + 21)
-                ]
-            )
+    # Read CSV from ESP-r once, then take each zone's block of rows
+    with open("temp.csv", "r") as file:
+        rows = list(csv.reader(file, delimiter=","))
+    data = [rows[19 * i + 6 : 19 * i + 21] for i in range(len(zones))]
 
     # remove temporary CSV file
     # Handle errors while calling os.remove()
@@ -672,7 +655,7 @@ def get_pv(res_file, elr_file, out_file=None):
     cmd = "\n".join(cmd)
     run(
         ["res", "-file", res_file, "-mode", "script"],
-        stdout=PIPE,
+        stdout=DEVNULL,
         stderr=PIPE,
         input=cmd,
         encoding="ascii",
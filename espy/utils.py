@@ -1,12 +1,14 @@
 #!/usr/bin/env python3
 """Low level utilities"""
+import os
 import re
-from os import fdopen
-from shutil import move
+from collections import defaultdict
+from shutil import copymode
 from tempfile import mkstemp
 import numpy as np
 import datetime as dt
 from calendar import monthrange
+from espy._kernels import as_polygon, cross_sums, polygon_area
 
 
 def header(str_in, lvl=0):
@@ -37,68 +39,88 @@ def space_data_to_list(item, convert="int"):
 def sed(pattern, replace, source, dest=None, count=0):
     """Reads a source file and writes the destination file.
 
-    In each line, replaces pattern with replace.
+    Replaces pattern with replace. The whole file is substituted in memory in
+    one pass; ^ and $ in str patterns match at each line, but patterns should
+    not match across line ends.
 
     Args:
         pattern (str): pattern to match (can be re.pattern)
-        replace (str): replacement str
+        replace (str): replacement str, or function of the match (as re.sub)
         source  (str): input filename
-        count (int): number of occurrences to replace
+        count (int): number of occurrences to replace, all if 0
         dest (str):   destination filename, if not given, source will be over written.
     """
-    fin = open(source, "r")
-    num_replaced = count
+    with open(source, "r") as fin:
+        text = fin.read()
 
-    if dest:
-        fout = open(dest, "w")
-    else:
-        file_handle, name = mkstemp()
-        fout = fdopen(file_handle, "w")
-
-    for line in fin:
-        out = re.sub(pattern, replace, line)
-        fout.write(out)
-
-        if out != line:
-            num_replaced += 1
-        if count and num_replaced > count:
-            break
-    try:
-        fout.writelines(fin.readlines())
-    except Exception as the_except:
-        raise the_except
-
-    fin.close()
-    fout.close()
+    if isinstance(pattern, str):
+        pattern = re.compile(pattern, re.MULTILINE)
+    out, num_replaced = pattern.subn(replace, text, count=count)
 
-    if not dest:
-        move(name, source)
+    if dest:
+        with open(dest, "w") as fout:
+            fout.write(out)
+    elif num_replaced:
+        # Write alongside the source and swap it in, so the file is never
+        # left half written.
+        file_handle, name = mkstemp(dir=os.path.dirname(os.path.abspath(source)))
+        try:
+            with os.fdopen(file_handle, "w") as fout:
+                fout.write(out)
+            copymode(source, name)
+            os.replace(name, source)
+        except BaseException:
+            os.remove(name)
+            raise
 
         
 def area(poly):
     """area of polygon poly
     Source: https://stackoverflow.com/a/12643315
     Source 2: http://geomalgorithms.com/a01-_area.html#3D%20Polygons
+
+    poly is a list of x, y, z vertices, or x, y plan vertices (z = 0).
     """
 
     if len(poly) < 3:  # not a plane - no area
         return 0
 
-    total = [0, 0, 0]
-    for i, _ in enumerate(poly):
-        vi1 = poly[i]
-        if i is len(poly) - 1:
-            vi2 = poly[0]
-        else:
-            vi2 = poly[i + 1]
-        prod = np.cross(vi1, vi2)
-        total[0] += prod[0]
-        total[1] += prod[1]
-        total[2] += prod[2]
-    result = np.linalg.norm(total)
-    return round(result / 2, 3)
+    result = float(polygon_area(as_polygon(poly)))
+    return round(result, 3)
 
     
+def surface_areas(vertices, edges):
+    """Areas of all surfaces of a zone, as area(...) would give for each.
+
+    Surfaces with the same number of vertices are calculated together in one
+    array operation.
+
+    Arguments
+        vertices: list, list (3), float or numpy.ndarray
+            zone vertex coordinates
+        edges: list, list, int
+            vertex numbers (1-indexed) of each surface
+
+    Returns
+        areas: list, float
+            in the same order as edges, as Python floats (like area(...),
+            rather than numpy.float64)
+    """
+    V = np.asarray(vertices, dtype=np.float64)
+    by_length = defaultdict(list)
+    for i, surface in enumerate(edges):
+        by_length[len(surface)].append(i)
+    areas = [0] * len(edges)  # not a plane (< 3 vertices) - no area
+    for n_verts, idx in by_length.items():
+        if n_verts < 3:
+            continue
+        P = V[np.array([edges[i] for i in idx]) - 1]  # (surfaces, vertices, 3)
+        x, y, z = cross_sums(P)
+        for i, result in zip(idx, np.sqrt(x * x + y * y + z * z).tolist()):
+            areas[i] = round(result / 2, 3)
+    return areas
+
+
 def dtparse_espr(d):
     """Parser for esp-r datetime format.
 